@@ -1,6 +1,8 @@
 import os
 from dotenv import load_dotenv
 import logging
+import multiprocessing
+import logging_setup
 
 # Load environment variables from .env file for local development
 dotenv_path = os.path.join(os.path.dirname(__file__), '.env')
@@ -30,8 +32,40 @@ AI_API_KEY = os.environ.get("AI_API_KEY")
 # Placeholder for other configs (e.g., D-ID key if re-enabled)
 # D_ID_API_KEY = os.environ.get("D_ID_API_KEY")
 
+# Local model runtime (see model_runtime.py)
+# Number of resident model instances kept loaded
+MODEL_POOL_SIZE = int(os.environ.get("MODEL_POOL_SIZE", "1"))
+# Max requests grouped into one inference call
+MODEL_MAX_BATCH_SIZE = int(os.environ.get("MODEL_MAX_BATCH_SIZE", "8"))
+# Max time (ms) the first request of a batch waits for others to join
+MODEL_MAX_WAIT_MS = float(os.environ.get("MODEL_MAX_WAIT_MS", "10"))
+
+# Tiled processing for large images (see tiling.py)
+# Worker processes for tiles. Defaults to the CPUs this process may run on
+# (affinity, not host core count). Fewer than 2 disables tiling, since a
+# single worker only adds overhead over processing the image whole.
+_AVAILABLE_CPUS = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+TILE_WORKERS = int(os.environ.get("TILE_WORKERS", str(_AVAILABLE_CPUS)))
+if TILE_WORKERS < 2:
+    TILE_WORKERS = 0
+# Large images decoded/stitched at once (bounds main-process memory)
+TILE_MAX_CONCURRENT_IMAGES = int(os.environ.get("TILE_MAX_CONCURRENT_IMAGES", "1"))
+# Images with at least this many pixels are split into tiles
+TILE_MIN_PIXELS = int(os.environ.get("TILE_MIN_PIXELS", "4000000"))
+# Per-transform tile size / overlap (px)
+ANIME_TILE_SIZE = int(os.environ.get("ANIME_TILE_SIZE", "1024"))
+ANIME_TILE_OVERLAP = int(os.environ.get("ANIME_TILE_OVERLAP", "16"))
+
 # Logging level
 LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+# Log output format: "text" or "json" (one JSON object per line)
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "text").lower()
+# Repeated log records from call sites that opt in (extra={"rate_limit": True},
+# e.g. broadcast failures): allow this many per window...
+LOG_RATE_LIMIT_BURST = int(os.environ.get("LOG_RATE_LIMIT_BURST", "10"))
+LOG_RATE_LIMIT_WINDOW_S = float(os.environ.get("LOG_RATE_LIMIT_WINDOW_S", "60"))
+# ...then only log 1 in every N
+LOG_RATE_LIMIT_SAMPLE_EVERY = int(os.environ.get("LOG_RATE_LIMIT_SAMPLE_EVERY", "100"))
 
 # Webhook URL (if using webhooks instead of polling)
 # RENDER_WEBHOOK_URL = os.environ.get("RENDER_WEBHOOK_URL") # e.g., https://your-app-name.onrender.com/
@@ -40,15 +74,23 @@ LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
 # Add more checks here if necessary
 
 # --- Setup Logging ---
-logging.basicConfig(
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", level=LOG_LEVEL
-)
+# Formatting and I/O run on a background thread (see logging_setup.py).
+# Skipped in tile worker processes, which re-import this module under 'spawn'
+# and would otherwise each start their own listener thread.
+if multiprocessing.parent_process() is None:
+    logging_setup.setup_logging(
+        level=LOG_LEVEL,
+        json_output=LOG_FORMAT == "json",
+        rate_limit_burst=LOG_RATE_LIMIT_BURST,
+        rate_limit_window_s=LOG_RATE_LIMIT_WINDOW_S,
+        rate_limit_sample_every=LOG_RATE_LIMIT_SAMPLE_EVERY,
+    )
 # Set higher logging level for httpx to avoid verbose messages
 logging.getLogger("httpx").setLevel(logging.WARNING)
 logger = logging.getLogger(__name__)
 
 logger.info("Configuration loaded.")
-logger.info(f"Admin User IDs: {ADMIN_USER_IDS}")
+logger.info("Admin User IDs: %s", ADMIN_USER_IDS)
 # Avoid logging sensitive keys directly
-logger.info(f"AI API Key Loaded: {'Yes' if AI_API_KEY else 'No'}")
+logger.info("AI API Key Loaded: %s", 'Yes' if AI_API_KEY else 'No')
 
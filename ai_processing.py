@@ -1,8 +1,10 @@
 import logging
-from PIL import Image
-import io
+import asyncio
+import functools
 import requests # Example if using an external API
 import config # To access config.AI_API_KEY if needed
+from model_runtime import ModelPool, CPUAnimeStandIn, CPUClothesStandIn
+from tiling import TileConfig
 
 logger = logging.getLogger(__name__)
 
@@ -14,29 +16,53 @@ def set_nsfw_mode(enabled: bool):
     """Sets the NSFW mode for AI processing."""
     global nsfw_mode_enabled
     nsfw_mode_enabled = enabled
-    logger.info(f"NSFW mode set to: {enabled}")
+    logger.info("NSFW mode set to: %s", enabled)
 
 def get_nsfw_mode() -> bool:
     """Gets the current NSFW mode status."""
     return nsfw_mode_enabled
 
+# --- Local Model Runtime ---
+# Resident model pools, loaded once at startup (see start_models) and shared
+# by all handlers. Swap the stand-in factories for your real model classes.
+anime_pool = ModelPool(
+    functools.partial(CPUAnimeStandIn, tiling=TileConfig(
+        tile_size=config.ANIME_TILE_SIZE,
+        overlap=config.ANIME_TILE_OVERLAP,
+        min_pixels=config.TILE_MIN_PIXELS,
+    )),
+    pool_size=config.MODEL_POOL_SIZE,
+    max_batch_size=config.MODEL_MAX_BATCH_SIZE,
+    max_wait_ms=config.MODEL_MAX_WAIT_MS,
+    tile_workers=config.TILE_WORKERS,
+    max_tiled_jobs=config.TILE_MAX_CONCURRENT_IMAGES,
+)
+clothes_pool = ModelPool(
+    CPUClothesStandIn,
+    pool_size=config.MODEL_POOL_SIZE,
+    max_batch_size=config.MODEL_MAX_BATCH_SIZE,
+    max_wait_ms=config.MODEL_MAX_WAIT_MS,
+)
+
+async def start_models():
+    """Loads and warms all model pools. Call once from the bot's post_init."""
+    await asyncio.gather(anime_pool.start(), clothes_pool.start())
+    logger.info("AI model pools started.")
+
+async def stop_models():
+    """Releases all model pools. Call from the bot's post_shutdown."""
+    await asyncio.gather(anime_pool.stop(), clothes_pool.stop())
+    logger.info("AI model pools stopped.")
+
 # --- Processing Functions ---
 
 async def apply_anime_filter(image_bytes: bytes) -> bytes | None:
     """
-    Placeholder function to apply an anime style filter.
-    Replace with your actual AI model call (local or API).
+    Applies an anime style filter using the resident local model pool.
+    Replace the pool's model (or use the API example) for real results.
     """
-    logger.info(f"Applying anime filter (NSFW Mode: {nsfw_mode_enabled})...")
+    logger.info("Applying anime filter (NSFW Mode: %s)...", nsfw_mode_enabled)
     try:
-        # --- Example: Using Pillow for a basic transformation ---
-        # image = Image.open(io.BytesIO(image_bytes))
-        # # Apply some basic filter (e.g., grayscale as a placeholder)
-        # processed_image = image.convert("L")
-        # output_buffer = io.BytesIO()
-        # processed_image.save(output_buffer, format='JPEG') # Or PNG
-        # return output_buffer.getvalue()
-
         # --- Example: Calling a hypothetical external API ---
         # api_url = "https://api.exampleaianime.com/transform"
         # headers = {"Authorization": f"Bearer {config.AI_API_KEY}"}
@@ -46,39 +72,32 @@ async def apply_anime_filter(image_bytes: bytes) -> bytes | None:
         # response.raise_for_status() # Raise exception for bad status codes
         # return response.content
 
-        # --- Placeholder Return ---
-        # Simulate processing time
-        # await asyncio.sleep(5)
-        logger.warning("AI function 'apply_anime_filter' is a placeholder.")
-        # Return original image slightly modified as placeholder
-        image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-        image = image.point(lambda p: p * 0.9) # Darken slightly
-        output_buffer = io.BytesIO()
-        image.save(output_buffer, format='JPEG')
-        return output_buffer.getvalue()
+        # --- Local model via the resident micro-batching pool ---
+        return await anime_pool.infer(image_bytes, allow_nsfw=nsfw_mode_enabled)
 
     except requests.exceptions.RequestException as e:
-        logger.error(f"API request failed for anime filter: {e}")
+        logger.error("API request failed for anime filter: %s", e)
         return None
     except Exception as e:
-        logger.error(f"Error applying anime filter: {e}", exc_info=True)
+        logger.error("Error applying anime filter: %s", e, exc_info=True)
         return None
 
 async def change_clothes(image_bytes: bytes, prompt: str) -> bytes | None:
     """
-    Placeholder function for virtual clothes changing.
-    Replace with your actual AI model call.
+    Virtual clothes changing using the resident local model pool.
+    The bundled model is a pass-through stand-in; replace it with a real one.
     """
-    logger.info(f"Applying clothes change with prompt: '{prompt}' (NSFW Mode: {nsfw_mode_enabled})...")
+    logger.info("Applying clothes change with prompt: '%s' (NSFW Mode: %s)...", prompt, nsfw_mode_enabled)
     try:
-        # --- Add your AI logic here ---
-        # Example API call structure might be similar to the anime filter
-        logger.warning("AI function 'change_clothes' is a placeholder.")
-        # Return original image as placeholder
-        return image_bytes
+        # --- Example: Calling a hypothetical external API ---
+        # Same structure as the anime filter example, e.g. with
+        # params = {'prompt': prompt, 'allow_nsfw': nsfw_mode_enabled}
+
+        # --- Local model via the resident micro-batching pool ---
+        return await clothes_pool.infer(image_bytes, prompt=prompt, allow_nsfw=nsfw_mode_enabled)
 
     except Exception as e:
-        logger.error(f"Error changing clothes: {e}", exc_info=True)
+        logger.error("Error changing clothes: %s", e, exc_info=True)
         return None
 
 # Add other AI functions here (lip sync if re-enabled, other filters)
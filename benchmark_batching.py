@@ -0,0 +1,83 @@
+"""
+Benchmark for the micro-batching model pool (model_runtime.py).
+
+Runs the CPU stand-in model under concurrent load for several
+max_batch_size / max_wait_ms settings and prints throughput and latency.
+
+Usage:
+    python benchmark_batching.py [--clients 32] [--requests 8] [--pool-size 1]
+"""
+import argparse
+import asyncio
+import io
+import statistics
+import time
+
+from PIL import Image
+
+from model_runtime import ModelPool, CPUAnimeStandIn
+
+# (max_batch_size, max_wait_ms) pairs to compare
+SETTINGS = [(1, 0), (4, 5), (8, 5), (8, 20), (16, 20), (32, 50)]
+
+
+def make_test_image(size: int) -> bytes:
+    image = Image.radial_gradient("L").resize((size, size)).convert("RGB")
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG')
+    return buffer.getvalue()
+
+
+async def run_setting(image_bytes: bytes, max_batch_size: int, max_wait_ms: float,
+                      clients: int, requests_per_client: int, pool_size: int,
+                      forward_overhead_s: float) -> dict:
+    pool = ModelPool(
+        lambda: CPUAnimeStandIn(forward_overhead_s=forward_overhead_s),
+        pool_size=pool_size, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms,
+    )
+    await pool.start()
+    latencies = []
+
+    async def client():
+        for _ in range(requests_per_client):
+            start = time.perf_counter()
+            await pool.infer(image_bytes)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+    await pool.stop()
+
+    latencies.sort()
+    return {
+        "throughput": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=32, help="Concurrent clients")
+    parser.add_argument("--requests", type=int, default=8, help="Requests per client")
+    parser.add_argument("--pool-size", type=int, default=1, help="Resident model instances")
+    parser.add_argument("--image-size", type=int, default=256, help="Test image edge length (px)")
+    parser.add_argument("--overhead-ms", type=float, default=20.0, help="Stand-in fixed cost per forward pass")
+    args = parser.parse_args()
+
+    image_bytes = make_test_image(args.image_size)
+    print(f"clients={args.clients} requests/client={args.requests} pool_size={args.pool_size} "
+          f"image={args.image_size}px overhead={args.overhead_ms}ms")
+    print(f"{'batch':>5} {'wait_ms':>7} {'img/s':>8} {'p50_ms':>8} {'p95_ms':>8}")
+    for max_batch_size, max_wait_ms in SETTINGS:
+        result = await run_setting(
+            image_bytes, max_batch_size, max_wait_ms,
+            args.clients, args.requests, args.pool_size, args.overhead_ms / 1000.0,
+        )
+        print(f"{max_batch_size:>5} {max_wait_ms:>7} {result['throughput']:>8.1f} "
+              f"{result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,86 @@
+"""
+Benchmark for the queue-based logging pipeline (logging_setup.py).
+
+Measures the per-call cost seen by the caller for a synchronous
+FileHandler versus the queue handler the bot installs (built with the
+same helpers as setup_logging), writing to a file so disk I/O is part of
+the synchronous path.
+
+Usage:
+    python benchmark_logging.py [--calls 20000] [--output /tmp/bench.log]
+"""
+import argparse
+import logging
+import logging.handlers
+import os
+import queue
+import tempfile
+import time
+
+from logging_setup import (
+    TextFormatter, TEXT_LOG_FORMAT, build_queue_handler, disable_unused_record_fields,
+)
+
+
+class _Payload:
+    """Stand-in for a large object (e.g. a Telegram Update) with a costly repr."""
+
+    def __repr__(self):
+        return "Update(" + ", ".join(f"field_{i}={i}" for i in range(200)) + ")"
+
+
+def time_calls(logger: logging.Logger, calls: int, message: str, *args, extra=None) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        logger.warning(message, *args, extra=extra)
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20000, help="Log calls per case")
+    parser.add_argument("--output", default=os.path.join(tempfile.gettempdir(), "bench_logging.log"),
+                        help="File the handlers write to (default: in the system temp dir)")
+    args = parser.parse_args()
+
+    payload = _Payload()
+    cases = [
+        ("short message", "Failed to send broadcast to user %s: %s", 12345, "Forbidden"),
+        ("large repr arg", "Update %s caused error %s", payload, "boom"),
+    ]
+
+    # Same record settings as the bot (setup_logging), applied to every case
+    disable_unused_record_fields()
+
+    file_handler = logging.FileHandler(args.output, mode="w")
+    file_handler.setFormatter(TextFormatter(TEXT_LOG_FORMAT))
+
+    # Synchronous: format + write on the calling thread (old basicConfig setup)
+    sync_logger = logging.getLogger("bench.sync")
+    sync_logger.propagate = False
+    sync_logger.addHandler(file_handler)
+
+    # Production handler (as built by setup_logging): enqueue only, the
+    # listener thread formats and writes. Not-opted-in records are "queued",
+    # opted-in repeated call sites are "limited" and mostly dropped up front.
+    log_queue = queue.SimpleQueue()
+    queued_logger = logging.getLogger("bench.queued")
+    queued_logger.propagate = False
+    queued_logger.addHandler(build_queue_handler(log_queue))
+    listener = logging.handlers.QueueListener(log_queue, file_handler)
+    listener.start()
+
+    print(f"calls={args.calls} output={args.output}")
+    print(f"{'case':<16} {'sync_us':>9} {'queued_us':>10} {'limited_us':>11}")
+    for name, message, *log_args in cases:
+        sync_us = time_calls(sync_logger, args.calls, message, *log_args)
+        queued_us = time_calls(queued_logger, args.calls, message, *log_args)
+        limited_us = time_calls(queued_logger, args.calls, message, *log_args, extra={"rate_limit": True})
+        print(f"{name:<16} {sync_us:>9.2f} {queued_us:>10.2f} {limited_us:>11.2f}")
+
+    listener.stop()
+    file_handler.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark for tiled processing of large images (tiling.py).
+
+Runs the anime stand-in transform on a large image whole (one core) and
+tiled across worker processes, and checks that the stitched output matches
+the whole-image result pixel for pixel (i.e. no seams).
+
+Usage:
+    python benchmark_tiling.py [--width 4000] [--height 3000] [--tile-size 1024] [--overlap 16]
+"""
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image, ImageChops
+
+from model_runtime import anime_stylize
+from tiling import TileConfig, process_tiled, split_tiles
+
+
+def make_test_image(width: int, height: int) -> Image.Image:
+    # Gradient plus noise so filters have real detail to work on
+    base = Image.radial_gradient("L").resize((width, height)).convert("RGB")
+    noise = Image.effect_noise((width, height), 64).convert("RGB")
+    return ImageChops.add(base, noise, scale=2.0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--width", type=int, default=4000)
+    parser.add_argument("--height", type=int, default=3000)
+    parser.add_argument("--tile-size", type=int, default=1024)
+    parser.add_argument("--overlap", type=int, default=16)
+    parser.add_argument("--repeats", type=int, default=3, help="Runs per case, best time is reported")
+    args = parser.parse_args()
+
+    image = make_test_image(args.width, args.height)
+    tile_config = TileConfig(tile_size=args.tile_size, overlap=args.overlap, min_pixels=0)
+    tiles = split_tiles(image.size, tile_config)
+    largest_tile = max((p[2] - p[0]) * (p[3] - p[1]) for _, p in tiles)
+    bytes_per_pixel = len(image.getbands())
+
+    print(f"image={args.width}x{args.height} ({args.width * args.height / 1e6:.1f} MP) "
+          f"tile={args.tile_size} overlap={args.overlap} tiles={len(tiles)} cores={os.cpu_count()}")
+    print(f"decoded image: {args.width * args.height * bytes_per_pixel / 1e6:.1f} MB, "
+          f"largest padded tile: {largest_tile * bytes_per_pixel / 1e6:.1f} MB")
+
+    whole_best = float("inf")
+    for _ in range(args.repeats):
+        start = time.perf_counter()
+        reference = anime_stylize(image, {})
+        whole_best = min(whole_best, time.perf_counter() - start)
+    print(f"{'mode':<12} {'workers':>7} {'time_s':>8} {'speedup':>8} {'max_diff':>8}")
+    print(f"{'whole':<12} {1:>7} {whole_best:>8.3f} {1.0:>8.2f} {0:>8}")
+
+    worker_counts = sorted({1, 2, 4, os.cpu_count() or 1})
+    for workers in worker_counts:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            # Spawn the workers before timing
+            list(executor.map(abs, range(workers)))
+            best = float("inf")
+            for _ in range(args.repeats):
+                start = time.perf_counter()
+                result = process_tiled(image, anime_stylize, tile_config, executor,
+                                       max_inflight=2 * workers)
+                best = min(best, time.perf_counter() - start)
+        max_diff = max(high for _, high in ImageChops.difference(reference, result).getextrema())
+        print(f"{'tiled':<12} {workers:>7} {best:>8.3f} {whole_best / best:>8.2f} {max_diff:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -32,7 +32,7 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handles the /start command."""
     user = update.effective_user
     user_id = user.id
-    logger.info(f"User {user_id} ({user.username}) started the bot.")
+    logger.info("User %s (%s) started the bot.", user_id, user.username)
 
     status = user_management.get_user_status(user_id)
     welcome_message = f"Welcome {user.mention_html()}!\n\n"
@@ -112,7 +112,7 @@ async def request_access_command(update: Update, context: ContextTypes.DEFAULT_T
             try:
                 await context.bot.send_message(chat_id=admin_id, text=notification, parse_mode=ParseMode.HTML)
             except Exception as e:
-                logger.error(f"Failed to send access request notification to admin {admin_id}: {e}")
+                logger.error("Failed to send access request notification to admin %s: %s", admin_id, e)
     else:
         # This case should ideally not happen if checks above are correct, but good to handle
         await update.message.reply_text("Could not process your request. You might already have access or a pending request.")
@@ -161,7 +161,7 @@ async def approve_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
             text="✅ Your access request has been approved! You can now use the bot freely."
         )
     except Exception as e:
-        logger.error(f"Failed to send approval notification to user {user_id_to_approve}: {e}")
+        logger.error("Failed to send approval notification to user %s: %s", user_id_to_approve, e)
 
 async def block_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Admin command to block (revoke approval) a user."""
@@ -185,7 +185,7 @@ async def block_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
             text="❌ Your access to the bot has been revoked by an admin."
         )
     except Exception as e:
-        logger.error(f"Failed to send block notification to user {user_id_to_block}: {e}")
+        logger.error("Failed to send block notification to user %s: %s", user_id_to_block, e)
 
 async def pending_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Admin command to list pending access requests."""
@@ -237,9 +237,9 @@ async def send_message_command(update: Update, context: ContextTypes.DEFAULT_TYP
             text=f"ℹ️ Message from Admin:\n\n{message_text}"
         )
         await update.message.reply_text(f"Message sent successfully to user {target_user_id}.")
-        logger.info(f"Admin {update.effective_user.id} sent message to {target_user_id}")
+        logger.info("Admin %s sent message to %s", update.effective_user.id, target_user_id)
     except Exception as e:
-        logger.error(f"Failed to send message to user {target_user_id}: {e}")
+        logger.error("Failed to send message to user %s: %s", target_user_id, e)
         await update.message.reply_text(f"Failed to send message: {e}")
 
 
@@ -259,7 +259,7 @@ async def broadcast_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     await update.message.reply_text(f"Starting broadcast to {len(approved_users)} approved users...")
-    logger.info(f"Admin {update.effective_user.id} starting broadcast.")
+    logger.info("Admin %s starting broadcast.", update.effective_user.id)
 
     success_count = 0
     failure_count = 0
@@ -272,7 +272,8 @@ async def broadcast_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
             success_count += 1
             await asyncio.sleep(0.1) # Small delay to avoid hitting rate limits aggressively
         except Exception as e:
-            logger.warning(f"Failed to send broadcast to user {user_id}: {e}")
+            # Opt in to rate limiting: a broadcast can fail for many users at once
+            logger.warning("Failed to send broadcast to user %s: %s", user_id, e, extra={"rate_limit": True})
             failure_count += 1
 
     await update.message.reply_text(
@@ -289,7 +290,7 @@ async def handle_photo(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     # 1. Check Access
     if not user_management.can_use_bot(user_id):
-        logger.warning(f"User {user_id} attempted photo upload without access.")
+        logger.warning("User %s attempted photo upload without access.", user_id)
         status = user_management.get_user_status(user_id)
         if status == "Trial Used (Blocked)":
              await update.message.reply_text("You have used your free trial. Use /request_access to get full access.")
@@ -304,7 +305,7 @@ async def handle_photo(update: Update, context: ContextTypes.DEFAULT_TYPE):
     photo_bytes = photo_bytes_io.getvalue()
     photo_bytes_io.close()
 
-    logger.info(f"User {user_id} uploaded a photo ({len(photo_bytes)} bytes).")
+    logger.info("User %s uploaded a photo (%s bytes).", user_id, len(photo_bytes))
     processing_msg = await update.message.reply_text("⏳ Processing your photo with AI magic...")
 
     # 3. Process Photo (using Anime filter as default example)
@@ -325,24 +326,25 @@ async def handle_photo(update: Update, context: ContextTypes.DEFAULT_TYPE):
             # 5. Update Trial Status (if applicable)
             if not user_management.has_access(user_id):
                 user_management.record_trial_use(user_id)
-                logger.info(f"Recorded trial use for user {user_id}.")
+                logger.info("Recorded trial use for user %s.", user_id)
                 # Optional: Send a follow-up message about trial ending
                 await update.message.reply_text("You have now used your one-time trial. Use /request_access to get full access for future use.")
 
         else:
             # Handle processing failure
             await processing_msg.edit_text("❌ Sorry, something went wrong during processing. Please try again later.")
-            logger.error(f"AI processing failed for user {user_id}.")
+            logger.error("AI processing failed for user %s.", user_id)
 
     except Exception as e:
-        logger.error(f"Error in handle_photo for user {user_id}: {e}", exc_info=True)
+        logger.error("Error in handle_photo for user %s: %s", user_id, e, exc_info=True)
         await processing_msg.edit_text("❌ An unexpected error occurred. Please report this if it persists.")
 
 
 # --- Error Handler ---
 async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE):
     """Log Errors caused by Updates."""
-    logger.error(f"Update {update} caused error {context.error}", exc_info=context.error)
+    # Lazy args: the Update repr and traceback are rendered on the logging thread
+    logger.error("Update %s caused error %s", update, context.error, exc_info=context.error)
     # Optionally, notify admin about critical errors
     # if isinstance(context.error, SomeCriticalError):
     #     for admin_id in config.ADMIN_USER_IDS:
@@ -351,7 +353,7 @@ async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE):
 
 # --- Main Application Setup ---
 async def post_init(application: Application):
-    """Set bot commands after initialization."""
+    """Set bot commands and load AI models after initialization."""
     commands = [
         BotCommand("start", "Start the bot and check status"),
         BotCommand("help", "Show help information"),
@@ -360,6 +362,12 @@ async def post_init(application: Application):
     ]
     await application.bot.set_my_commands(commands)
     logger.info("Bot commands set.")
+    # Load and warm local models once, before any update is handled
+    await ai_processing.start_models()
+
+async def post_shutdown(application: Application):
+    """Release AI models on shutdown."""
+    await ai_processing.stop_models()
 
 def main():
     """Start the bot."""
@@ -381,6 +389,7 @@ def main():
         .token(config.TELEGRAM_BOT_TOKEN)
         .defaults(defaults)
         .post_init(post_init)
+        .post_shutdown(post_shutdown)
         .build()
     )
 
@@ -0,0 +1,190 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+# --- Handlers ---
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that skips formatting on the calling thread.
+    The stock QueueHandler renders the message (and traceback) in prepare(),
+    which puts that cost back on the event loop. Records are handed over
+    as-is and formatted by the listener thread instead, so objects passed
+    as log args must not be mutated after the call.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Rate-limits repeated records from call sites that opt in with
+    `extra={"rate_limit": True}`, e.g. per-user failures inside a broadcast
+    loop. Everything else always passes, so ordinary errors and their
+    tracebacks are never sampled away.
+    Records are keyed by (logger, message template, level), so opted-in calls
+    must use lazy %-style args. Within each `window_s`, the first `burst`
+    records pass, then only every `sample_every`-th one. Passed records carry
+    a `suppressed` count of the similar records dropped before it.
+    """
+
+    def __init__(self, burst: int = 10, window_s: float = 60.0, sample_every: int = 100,
+                 max_keys: int = 1024):
+        super().__init__()
+        self.burst = burst
+        self.window_s = window_s
+        self.sample_every = max(1, sample_every)
+        self.max_keys = max_keys
+        # key -> [window_start, count_in_window, suppressed_since_last_emit]
+        self._state: Dict[Tuple[str, object, int], list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, "rate_limit", False):
+            return True
+        key = (record.name, record.msg, record.levelno)
+        now = time.monotonic()
+        with self._lock:
+            state = self._state.get(key)
+            if state is None or now - state[0] >= self.window_s:
+                suppressed = state[2] if state is not None else 0
+                if state is None and len(self._state) >= self.max_keys:
+                    self._evict_expired(now)
+                    if len(self._state) >= self.max_keys:
+                        # Table full of live keys: let it through untracked
+                        return True
+                self._state[key] = [now, 1, 0]
+            else:
+                state[1] += 1
+                count = state[1]
+                if count > self.burst and (count - self.burst) % self.sample_every:
+                    state[2] += 1
+                    return False
+                suppressed = state[2]
+                state[2] = 0
+        record.suppressed = suppressed
+        return True
+
+    def _evict_expired(self, now: float):
+        # Called with the lock held. Drops keys whose window has ended; their
+        # pending suppressed counts are lost, which is acceptable for sampling.
+        expired = [key for key, state in self._state.items() if now - state[0] >= self.window_s]
+        for key in expired:
+            del self._state[key]
+
+# --- Formatters ---
+
+class TextFormatter(logging.Formatter):
+    """Plain text formatter that notes how many similar records were rate-limited."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        message = super().format(record)
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            message += f" [{suppressed} similar messages suppressed]"
+        return message
+
+
+# Attributes every LogRecord has, plus our own control flags; anything else
+# on a record came from `extra=` and is copied into JSON output
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {
+    "message", "asctime", "rate_limit", "suppressed",
+}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats each record as a single JSON object per line.
+    Fields passed via `extra=` (e.g. `extra={"user_id": 42}`) are included
+    as top-level keys; values that aren't JSON types are stringified.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and key not in entry:
+                entry[key] = value
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            entry["suppressed"] = suppressed
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack_info"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str)
+
+# --- Setup ---
+
+TEXT_LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+def disable_unused_record_fields():
+    """
+    Skips per-record work our formats never use (see "Optimization" in the
+    logging HOWTO). Caller lookup walks the stack on every call; without it
+    %(filename)s, %(lineno)d and %(funcName)s are not available.
+    """
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+    logging._srcfile = None
+
+def build_queue_handler(log_queue: queue.SimpleQueue, rate_limit_burst: int = 10,
+                        rate_limit_window_s: float = 60.0,
+                        rate_limit_sample_every: int = 100) -> DeferredQueueHandler:
+    """Builds the caller-side handler: defer formatting, rate-limit opted-in records."""
+    queue_handler = DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(RateLimitFilter(
+        burst=rate_limit_burst, window_s=rate_limit_window_s, sample_every=rate_limit_sample_every,
+    ))
+    return queue_handler
+
+def setup_logging(level: str = "INFO", json_output: bool = False, rate_limit_burst: int = 10,
+                  rate_limit_window_s: float = 60.0, rate_limit_sample_every: int = 100):
+    """
+    Routes all logging through a queue to a background thread.
+    Callers only build a LogRecord and enqueue it; formatting and stream
+    I/O happen on the listener thread. Safe to call more than once.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    disable_unused_record_fields()
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(JsonFormatter() if json_output else TextFormatter(TEXT_LOG_FORMAT))
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = build_queue_handler(
+        log_queue, rate_limit_burst=rate_limit_burst, rate_limit_window_s=rate_limit_window_s,
+        rate_limit_sample_every=rate_limit_sample_every,
+    )
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+def stop_logging():
+    """Flushes queued records and stops the background thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
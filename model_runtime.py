@@ -0,0 +1,436 @@
+import asyncio
+import io
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from PIL import Image, ImageFilter, ImageOps
+
+from tiling import TileConfig, process_tiled
+
+logger = logging.getLogger(__name__)
+
+# --- Model Interface ---
+
+class BaseModel:
+    """
+    Base class for a locally hosted model kept resident in a ModelPool.
+    Subclasses load weights in `load()` and implement `predict_batch()`.
+    Models whose output is local (each pixel depends only on a bounded
+    neighbourhood) can also set `tiling` and implement `transform_tile()` so
+    that large images are split into tiles and processed across worker
+    processes, each holding its own resident, warmed instance.
+    """
+    name = "base"
+    tiling: Optional[TileConfig] = None
+
+    def load(self):
+        """Loads model weights / allocates buffers. Called once per instance."""
+
+    def warmup(self):
+        """Runs a dummy batch so the first real request doesn't pay for lazy init."""
+        dummy = Image.new("RGB", (64, 64))
+        self.predict_batch([dummy], [{}])
+
+    def preprocess(self, image_bytes: bytes) -> Image.Image:
+        """
+        Decodes raw upload bytes into model input.
+        Like every other method, only called on an instance the pool has
+        taken from its idle queue, so it may use per-instance state.
+        """
+        return Image.open(io.BytesIO(image_bytes)).convert("RGB")
+
+    def predict_batch(self, images: List[Image.Image], params: List[Dict[str, Any]]) -> List[Image.Image]:
+        """Runs inference on a batch. Must return one output per input, in order."""
+        raise NotImplementedError
+
+    def transform_tile(self, tile: Image.Image, params: Dict[str, Any]) -> Image.Image:
+        """Runs the model on one tile. Must return a tile of the same size."""
+        raise NotImplementedError
+
+    def postprocess(self, image: Image.Image) -> bytes:
+        """Encodes model output back to bytes for sending to Telegram."""
+        output_buffer = io.BytesIO()
+        image.save(output_buffer, format='JPEG')
+        return output_buffer.getvalue()
+
+
+def anime_stylize(image: Image.Image, params: Dict[str, Any]) -> Image.Image:
+    """Stand-in anime effect: smooth then posterize. Receptive radius is 2px."""
+    smoothed = image.filter(ImageFilter.SMOOTH_MORE)
+    return ImageOps.posterize(smoothed, 4)
+
+
+class CPUAnimeStandIn(BaseModel):
+    """
+    CPU stand-in for a real anime-style model. Uses Pillow ops in place of a
+    network, plus a fixed per-forward cost to mimic the dispatch/launch
+    overhead that makes batching worthwhile on a real accelerator.
+    """
+    name = "anime_cpu"
+
+    def __init__(self, forward_overhead_s: float = 0.02, per_image_s: float = 0.0,
+                 tiling: Optional[TileConfig] = None):
+        self.tiling = tiling
+        self.forward_overhead_s = forward_overhead_s
+        self.per_image_s = per_image_s
+        self._loaded = False
+
+    def load(self):
+        # A real model would read weights from disk here
+        self._loaded = True
+
+    def predict_batch(self, images: List[Image.Image], params: List[Dict[str, Any]]) -> List[Image.Image]:
+        if not self._loaded:
+            raise RuntimeError(f"Model '{self.name}' used before load()")
+        # Fixed cost paid once per forward pass, regardless of batch size
+        time.sleep(self.forward_overhead_s)
+        outputs = []
+        for image, image_params in zip(images, params):
+            if self.per_image_s:
+                time.sleep(self.per_image_s)
+            outputs.append(anime_stylize(image, image_params))
+        return outputs
+
+    def transform_tile(self, tile: Image.Image, params: Dict[str, Any]) -> Image.Image:
+        if not self._loaded:
+            raise RuntimeError(f"Model '{self.name}' used before load()")
+        return anime_stylize(tile, params)
+
+
+class CPUClothesStandIn(BaseModel):
+    """
+    CPU stand-in for a clothes-changing model. Returns the uploaded bytes
+    unchanged: no decode, and no lossy JPEG re-encode.
+    """
+    name = "clothes_cpu"
+
+    def preprocess(self, image_bytes: bytes) -> bytes:
+        return image_bytes
+
+    def predict_batch(self, images: List[Any], params: List[Dict[str, Any]]) -> List[Any]:
+        return list(images)
+
+    def postprocess(self, image: bytes) -> bytes:
+        return image
+
+# --- Tile Worker Processes ---
+
+# Resident model of the current tile worker process (set by the initializer)
+_tile_worker_model: Optional[BaseModel] = None
+
+def _init_tile_worker(model_factory: Callable[[], BaseModel]):
+    """ProcessPoolExecutor initializer: builds, loads and warms one model per worker."""
+    global _tile_worker_model
+    _tile_worker_model = model_factory()
+    _tile_worker_model.load()
+    _tile_worker_model.warmup()
+
+def _tile_worker_ready(_) -> bool:
+    return _tile_worker_model is not None
+
+def _transform_tile_in_worker(tile: Image.Image, params: Dict[str, Any]) -> Image.Image:
+    """Picklable tile transform that runs on the worker's resident model."""
+    return _tile_worker_model.transform_tile(tile, params)
+
+# --- Micro-Batching Pool ---
+
+@dataclass
+class _PendingRequest:
+    image_bytes: bytes
+    params: Dict[str, Any]
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class ModelPool:
+    """
+    Keeps `pool_size` resident instances of a model and groups concurrent
+    requests into micro-batches of up to `max_batch_size`, waiting at most
+    `max_wait_ms` after the first request of a batch arrives.
+    Inference runs on a thread pool so the event loop is never blocked.
+    If the model sets `tiling` and `tile_workers` > 0, images at or above the
+    model's tiling threshold skip batching and are split into tiles across
+    `tile_workers` processes. At most `max_tiled_jobs` large images are
+    decoded and stitched at once, which bounds main-process memory. Decode
+    and encode of a tiled image still run on an idle pool instance. If a
+    tile worker dies, the worker pool is rebuilt and the image retried once,
+    then processed whole through the batch path.
+    `model_factory` must be picklable (e.g. a class or functools.partial) so
+    the worker processes can build their own instances.
+    """
+
+    def __init__(self, model_factory: Callable[[], BaseModel], pool_size: int = 1,
+                 max_batch_size: int = 8, max_wait_ms: float = 10.0,
+                 tile_workers: int = 0, max_tiled_jobs: int = 1):
+        if pool_size < 1 or max_batch_size < 1 or max_wait_ms < 0:
+            raise ValueError("pool_size and max_batch_size must be >= 1 and max_wait_ms >= 0")
+        if tile_workers < 0 or max_tiled_jobs < 1:
+            raise ValueError("tile_workers must be >= 0 and max_tiled_jobs must be >= 1")
+        self.model_factory = model_factory
+        self.pool_size = pool_size
+        self.max_batch_size = max_batch_size
+        self.max_wait_s = max_wait_ms / 1000.0
+        self.tile_workers = tile_workers
+        self.max_tiled_jobs = max_tiled_jobs
+        self._tile_executor: Optional[ProcessPoolExecutor] = None
+        self._tiled_jobs: Optional[ThreadPoolExecutor] = None
+        self._tiled_slots: Optional[asyncio.Semaphore] = None
+        self._tile_lock: Optional[asyncio.Lock] = None
+        self._instances: List[BaseModel] = []
+        self._idle: Optional[asyncio.Queue] = None
+        self._requests: Optional[asyncio.Queue] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._collector: Optional[asyncio.Task] = None
+        self._inflight: set = set()
+
+    @property
+    def started(self) -> bool:
+        return self._collector is not None
+
+    async def start(self):
+        """Loads and warms every instance, then starts the batch collector."""
+        if self.started:
+            return
+        loop = asyncio.get_running_loop()
+        self._executor = ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix="model")
+        self._instances = [self.model_factory() for _ in range(self.pool_size)]
+        await asyncio.gather(*(
+            loop.run_in_executor(self._executor, self._load_and_warm, instance)
+            for instance in self._instances
+        ))
+        if self.tile_workers and self._instances[0].tiling is not None:
+            await self._start_tile_workers()
+        self._idle = asyncio.Queue()
+        for instance in self._instances:
+            self._idle.put_nowait(instance)
+        self._requests = asyncio.Queue()
+        self._collector = asyncio.create_task(self._collect_batches())
+        logger.info("Model pool '%s' ready (instances=%d, max_batch=%d, max_wait=%.1fms, tile_workers=%d)",
+                    self._instances[0].name, self.pool_size, self.max_batch_size, self.max_wait_s * 1000,
+                    self.tile_workers if self._tile_executor else 0)
+
+    async def _start_tile_workers(self):
+        self._tiled_jobs = ThreadPoolExecutor(max_workers=self.max_tiled_jobs, thread_name_prefix="tiled")
+        self._tiled_slots = asyncio.Semaphore(self.max_tiled_jobs)
+        self._tile_lock = asyncio.Lock()
+        self._tile_executor = await self._new_tile_executor()
+
+    async def _new_tile_executor(self) -> ProcessPoolExecutor:
+        # Under 'spawn' each worker re-imports the main script as __mp_main__
+        # (bot.py, and through it config), so module-level side effects there
+        # run again; config only sets up the logging listener in the parent.
+        executor = ProcessPoolExecutor(
+            max_workers=self.tile_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_tile_worker,
+            initargs=(self.model_factory,),
+        )
+        # Start every worker (and load its model) now rather than on the first large photo
+        await asyncio.get_running_loop().run_in_executor(
+            None, lambda: list(executor.map(_tile_worker_ready, range(self.tile_workers)))
+        )
+        return executor
+
+    async def _rebuild_tile_executor(self, broken: ProcessPoolExecutor):
+        """Replaces a tile worker pool that lost a process (e.g. to the OOM killer)."""
+        async with self._tile_lock:
+            if self._tile_executor is not broken:
+                # Another job already rebuilt it
+                return
+            broken.shutdown(wait=False, cancel_futures=True)
+            logger.warning("Tile worker died in model pool '%s'; restarting %d workers",
+                           self._instances[0].name, self.tile_workers)
+            self._tile_executor = await self._new_tile_executor()
+
+    async def stop(self):
+        """Stops the collector, waits for running batches and releases the instances."""
+        if not self.started:
+            return
+        self._collector.cancel()
+        try:
+            await self._collector
+        except asyncio.CancelledError:
+            pass
+        self._collector = None
+        # Fail anything still queued rather than leaving callers hanging. Done
+        # before waiting on in-flight work, since a tiled job falling back to
+        # the batch path may be waiting on one of these.
+        while not self._requests.empty():
+            request = self._requests.get_nowait()
+            if not request.future.done():
+                request.future.set_exception(RuntimeError("Model pool stopped"))
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+        self._executor.shutdown(wait=True)
+        self._executor = None
+        if self._tile_executor is not None:
+            self._tiled_jobs.shutdown(wait=True)
+            self._tiled_jobs = None
+            self._tile_executor.shutdown(wait=True)
+            self._tile_executor = None
+        self._instances = []
+
+    async def infer(self, image_bytes: bytes, **params) -> bytes:
+        """Submits one image and waits for its result from a micro-batch."""
+        if not self.started:
+            raise RuntimeError("Model pool is not started")
+        if self._tile_executor is not None and self._should_tile(image_bytes):
+            # Tracked in _inflight so stop() waits for it like a running batch
+            job = asyncio.create_task(self._infer_tiled(image_bytes, params))
+            self._inflight.add(job)
+            job.add_done_callback(self._inflight.discard)
+            return await job
+        return await self._infer_batched(image_bytes, params)
+
+    async def _infer_batched(self, image_bytes: bytes, params: Dict[str, Any]) -> bytes:
+        if not self.started:
+            raise RuntimeError("Model pool stopped")
+        future = asyncio.get_running_loop().create_future()
+        await self._requests.put(_PendingRequest(image_bytes, params, future))
+        return await future
+
+    async def _infer_tiled(self, image_bytes: bytes, params: Dict[str, Any]) -> bytes:
+        loop = asyncio.get_running_loop()
+        async with self._tiled_slots:
+            image = await self._run_on_instance(lambda instance: instance.preprocess(image_bytes))
+            tiling = self._instances[0].tiling
+            output = None
+            for attempt in range(2):
+                executor = self._tile_executor
+                try:
+                    output = await loop.run_in_executor(self._tiled_jobs, self._stitch_tiles,
+                                                        image, tiling, executor, params)
+                    break
+                except BrokenProcessPool:
+                    try:
+                        await self._rebuild_tile_executor(executor)
+                    except Exception as e:
+                        logger.error("Could not restart tile workers: %s", e, exc_info=True)
+                        break
+            del image
+        if output is None:
+            logger.warning("Tiled processing failed in model pool '%s'; processing image whole",
+                           self._instances[0].name)
+            return await self._infer_batched(image_bytes, params)
+        return await self._run_on_instance(lambda instance: instance.postprocess(output))
+
+    async def _run_on_instance(self, fn: Callable[[BaseModel], Any]) -> Any:
+        """Runs `fn(instance)` on the model threads with an instance taken from the idle queue."""
+        instance = await self._idle.get()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, instance)
+        finally:
+            self._idle.put_nowait(instance)
+
+    def _should_tile(self, image_bytes: bytes) -> bool:
+        try:
+            # Only the header is parsed here, pixel data is not decoded
+            size = Image.open(io.BytesIO(image_bytes)).size
+        except Exception:
+            # Let the batch path report the decode error for this request
+            return False
+        return self._instances[0].tiling.should_tile(size)
+
+    @staticmethod
+    def _load_and_warm(instance: BaseModel):
+        instance.load()
+        instance.warmup()
+
+    async def _collect_batches(self):
+        while True:
+            instance = None
+            batch: List[_PendingRequest] = []
+            try:
+                batch.append(await self._requests.get())
+                # Only form the batch once an instance is free, so requests that
+                # arrive while every instance is busy get merged into it
+                instance = await self._idle.get()
+                deadline = batch[0].enqueued_at + self.max_wait_s
+                while len(batch) < self.max_batch_size:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        # Past the deadline: still sweep up anything already queued
+                        while len(batch) < self.max_batch_size and not self._requests.empty():
+                            batch.append(self._requests.get_nowait())
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._requests.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+            except asyncio.CancelledError:
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(RuntimeError("Model pool stopped"))
+                if instance is not None:
+                    self._idle.put_nowait(instance)
+                raise
+            task = asyncio.create_task(self._run_batch(instance, batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _run_batch(self, instance: BaseModel, batch: List[_PendingRequest]):
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(
+                self._executor, self._process_batch, instance,
+                [request.image_bytes for request in batch],
+                [request.params for request in batch],
+            )
+            for request, result in zip(batch, results):
+                if request.future.done():
+                    continue
+                if isinstance(result, Exception):
+                    request.future.set_exception(result)
+                else:
+                    request.future.set_result(result)
+        except Exception as e:
+            logger.error("Batch of %d failed in model '%s': %s", len(batch), instance.name, e, exc_info=True)
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_exception(e)
+        finally:
+            self._idle.put_nowait(instance)
+
+    def _stitch_tiles(self, image: Image.Image, tiling: TileConfig, executor: ProcessPoolExecutor,
+                      params: Dict[str, Any]) -> Image.Image:
+        # Runs on a _tiled_jobs thread; tiles run on the workers' resident models.
+        # Keep every worker busy with one tile in hand and one queued.
+        return process_tiled(image, _transform_tile_in_worker, tiling, executor, params,
+                             max_inflight=2 * self.tile_workers)
+
+    @staticmethod
+    def _process_batch(instance: BaseModel, images: List[bytes], params: List[Dict[str, Any]]) -> List[Any]:
+        """
+        Decodes, infers and encodes a batch on the worker thread.
+        Returns one entry per request: the encoded bytes, or the exception that
+        request hit while decoding/encoding, so one bad upload only fails itself.
+        """
+        results: List[Any] = [None] * len(images)
+        inputs, input_params, slots = [], [], []
+        for slot, image_bytes in enumerate(images):
+            try:
+                inputs.append(instance.preprocess(image_bytes))
+            except Exception as e:
+                logger.warning("Could not decode input for model '%s': %s", instance.name, e)
+                results[slot] = e
+                continue
+            input_params.append(params[slot])
+            slots.append(slot)
+        if not inputs:
+            return results
+
+        outputs = instance.predict_batch(inputs, input_params)
+        if len(outputs) != len(inputs):
+            raise RuntimeError(f"Model '{instance.name}' returned {len(outputs)} outputs for {len(inputs)} inputs")
+        for slot, output in zip(slots, outputs):
+            try:
+                results[slot] = instance.postprocess(output)
+            except Exception as e:
+                logger.warning("Could not encode output for model '%s': %s", instance.name, e)
+                results[slot] = e
+        return results
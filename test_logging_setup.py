@@ -0,0 +1,110 @@
+import json
+import logging
+import sys
+import unittest
+from unittest import mock
+
+from logging_setup import JsonFormatter, RateLimitFilter
+
+
+def make_record(msg: str = "Failed to send broadcast to user %s: %s", rate_limit: bool = True,
+                name: str = "bot", level: int = logging.WARNING, exc_info=None) -> logging.LogRecord:
+    record = logging.LogRecord(name, level, __file__, 1, msg, (1, "Forbidden"), exc_info)
+    if rate_limit:
+        record.rate_limit = True
+    return record
+
+
+class RateLimitFilterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch("logging_setup.time.monotonic", side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_records_not_opted_in_always_pass(self):
+        limiter = RateLimitFilter(burst=1, sample_every=100)
+        records = [make_record(rate_limit=False, level=logging.ERROR) for _ in range(50)]
+        self.assertTrue(all(limiter.filter(record) for record in records))
+        self.assertEqual(limiter._state, {})
+
+    def test_burst_then_one_in_n(self):
+        limiter = RateLimitFilter(burst=3, window_s=60, sample_every=5)
+        passed = [limiter.filter(make_record()) for _ in range(13)]
+        # 3 burst, then records 8 and 13 (every 5th after the burst)
+        self.assertEqual(passed, [True] * 3 + [False] * 4 + [True] + [False] * 4 + [True])
+
+    def test_sampled_record_carries_suppressed_count(self):
+        limiter = RateLimitFilter(burst=1, window_s=60, sample_every=3)
+        records = [make_record() for _ in range(4)]
+        passed = [limiter.filter(record) for record in records]
+        self.assertEqual(passed, [True, False, False, True])
+        self.assertEqual(records[0].suppressed, 0)
+        self.assertEqual(records[3].suppressed, 2)
+
+    def test_suppressed_count_carried_across_window_rollover(self):
+        limiter = RateLimitFilter(burst=1, window_s=10, sample_every=100)
+        for _ in range(5):
+            limiter.filter(make_record())
+        self.now += 10
+        record = make_record()
+        self.assertTrue(limiter.filter(record))
+        self.assertEqual(record.suppressed, 4)
+        # New window starts with a fresh burst
+        self.assertFalse(limiter.filter(make_record()))
+
+    def test_keys_are_per_call_site(self):
+        limiter = RateLimitFilter(burst=1, window_s=60, sample_every=100)
+        self.assertTrue(limiter.filter(make_record("first %s %s")))
+        self.assertTrue(limiter.filter(make_record("second %s %s")))
+        self.assertTrue(limiter.filter(make_record("first %s %s", level=logging.ERROR)))
+        self.assertFalse(limiter.filter(make_record("first %s %s")))
+
+    def test_evicts_expired_keys_at_max_keys(self):
+        limiter = RateLimitFilter(burst=1, window_s=10, sample_every=100, max_keys=2)
+        limiter.filter(make_record("a %s %s"))
+        self.now += 5
+        limiter.filter(make_record("b %s %s"))
+        self.now += 6  # "a" has expired, "b" has not
+        self.assertTrue(limiter.filter(make_record("c %s %s")))
+        self.assertEqual({key[1] for key in limiter._state}, {"b %s %s", "c %s %s"})
+
+    def test_full_table_of_live_keys_passes_untracked(self):
+        limiter = RateLimitFilter(burst=1, window_s=10, sample_every=100, max_keys=2)
+        limiter.filter(make_record("a %s %s"))
+        limiter.filter(make_record("b %s %s"))
+        for _ in range(3):
+            self.assertTrue(limiter.filter(make_record("c %s %s")))
+        self.assertEqual(len(limiter._state), 2)
+
+
+class JsonFormatterTest(unittest.TestCase):
+
+    def test_exception_record_is_one_json_line(self):
+        try:
+            raise ValueError("boom\nwith newline")
+        except ValueError:
+            record = make_record("Error applying anime filter for user %s: %s", rate_limit=False,
+                                 level=logging.ERROR, exc_info=sys.exc_info())
+        output = JsonFormatter().format(record)
+        self.assertNotIn("\n", output)
+        entry = json.loads(output)
+        self.assertEqual(entry["level"], "ERROR")
+        self.assertEqual(entry["message"], "Error applying anime filter for user 1: Forbidden")
+        self.assertIn("ValueError: boom", entry["exc_info"])
+
+    def test_extra_fields_are_included(self):
+        logger = logging.getLogger("test_logging_setup.json")
+        record = logger.makeRecord(logger.name, logging.INFO, __file__, 1, "User %s uploaded a photo",
+                                   (42,), None, extra={"user_id": 42, "size": object(), "rate_limit": True})
+        entry = json.loads(JsonFormatter().format(record))
+        self.assertEqual(entry["user_id"], 42)
+        self.assertIsInstance(entry["size"], str)
+        self.assertNotIn("rate_limit", entry)
+        self.assertNotIn("msg", entry)
+        self.assertNotIn("args", entry)
+
+
+if __name__ == "__main__":
+    unittest.main()
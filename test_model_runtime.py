@@ -0,0 +1,123 @@
+import asyncio
+import io
+import threading
+import time
+import unittest
+
+from PIL import Image, UnidentifiedImageError
+
+from model_runtime import BaseModel, ModelPool, CPUAnimeStandIn
+
+
+def make_jpeg(size: int = 64) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (size, size), "red").save(buffer, format='JPEG')
+    return buffer.getvalue()
+
+
+class RecordingModel(BaseModel):
+    """Pass-through stub that records each batch and can be held mid-batch."""
+    name = "recording"
+
+    def __init__(self):
+        self.batch_sizes = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def warmup(self):
+        pass
+
+    def preprocess(self, image_bytes: bytes) -> bytes:
+        return image_bytes
+
+    def predict_batch(self, images, params):
+        self.batch_sizes.append(len(images))
+        self.release.wait(5)
+        return list(images)
+
+    def postprocess(self, image: bytes) -> bytes:
+        return image
+
+
+class ModelPoolTest(unittest.TestCase):
+
+    def test_concurrent_requests_grouped_into_bounded_batches(self):
+        model = RecordingModel()
+
+        async def run():
+            pool = ModelPool(lambda: model, max_batch_size=4, max_wait_ms=50)
+            await pool.start()
+            try:
+                return await asyncio.gather(*(pool.infer(bytes([i])) for i in range(10)))
+            finally:
+                await pool.stop()
+
+        results = asyncio.run(run())
+        self.assertEqual(results, [bytes([i]) for i in range(10)])
+        self.assertEqual(sum(model.batch_sizes), 10)
+        self.assertTrue(all(size <= 4 for size in model.batch_sizes), model.batch_sizes)
+        self.assertEqual(model.batch_sizes, [4, 4, 2])
+
+    def test_lone_request_dispatched_after_max_wait(self):
+        model = RecordingModel()
+
+        async def run():
+            pool = ModelPool(lambda: model, max_batch_size=8, max_wait_ms=100)
+            await pool.start()
+            try:
+                start = time.monotonic()
+                await pool.infer(b"x")
+                return time.monotonic() - start
+            finally:
+                await pool.stop()
+
+        elapsed = asyncio.run(run())
+        self.assertEqual(model.batch_sizes, [1])
+        self.assertGreaterEqual(elapsed, 0.09)
+        self.assertLess(elapsed, 0.5)
+
+    def test_stop_fails_queued_requests(self):
+        model = RecordingModel()
+        model.release.clear()
+
+        async def run():
+            pool = ModelPool(lambda: model, max_batch_size=1, max_wait_ms=0)
+            await pool.start()
+            requests = [asyncio.create_task(pool.infer(bytes([i]))) for i in range(3)]
+            # Let the first request start its batch; the others wait behind it
+            while not model.batch_sizes:
+                await asyncio.sleep(0.01)
+            stopping = asyncio.create_task(pool.stop())
+            await asyncio.sleep(0.05)
+            model.release.set()
+            await asyncio.wait_for(stopping, 5)
+            return await asyncio.gather(*requests, return_exceptions=True)
+
+        first, *queued = asyncio.run(run())
+        self.assertEqual(first, bytes([0]))
+        for result in queued:
+            self.assertIsInstance(result, RuntimeError)
+            self.assertEqual(str(result), "Model pool stopped")
+
+    def test_bad_request_does_not_fail_its_batch(self):
+        async def run():
+            # Long wait so all three requests land in the same micro-batch
+            pool = ModelPool(lambda: CPUAnimeStandIn(forward_overhead_s=0), max_batch_size=8, max_wait_ms=200)
+            await pool.start()
+            try:
+                return await asyncio.gather(
+                    pool.infer(make_jpeg()), pool.infer(b"garbage"), pool.infer(make_jpeg()),
+                    return_exceptions=True,
+                )
+            finally:
+                await pool.stop()
+
+        good_1, bad, good_2 = asyncio.run(run())
+        self.assertIsInstance(bad, UnidentifiedImageError)
+        for result in (good_1, good_2):
+            self.assertIsInstance(result, bytes)
+            self.assertEqual(Image.open(io.BytesIO(result)).size, (64, 64))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, ImageChops
+
+from model_runtime import anime_stylize
+from tiling import TileConfig, process_tiled, split_tiles
+
+
+def make_test_image(width: int, height: int) -> Image.Image:
+    base = Image.radial_gradient("L").resize((width, height)).convert("RGB")
+    noise = Image.effect_noise((width, height), 64).convert("RGB")
+    return ImageChops.add(base, noise, scale=2.0)
+
+
+class SplitTilesTest(unittest.TestCase):
+
+    def assert_cores_cover_once(self, size, config):
+        width, height = size
+        coverage = [[0] * width for _ in range(height)]
+        for (left, top, right, bottom), padded in split_tiles(size, config):
+            self.assertLessEqual(padded[0], left)
+            self.assertLessEqual(padded[1], top)
+            self.assertGreaterEqual(padded[2], right)
+            self.assertGreaterEqual(padded[3], bottom)
+            self.assertEqual(padded, (max(padded[0], 0), max(padded[1], 0),
+                                      min(padded[2], width), min(padded[3], height)))
+            for y in range(top, bottom):
+                for x in range(left, right):
+                    coverage[y][x] += 1
+        self.assertTrue(all(count == 1 for row in coverage for count in row))
+
+    def test_cores_cover_image_exactly_once(self):
+        # Exact multiple, edge remainders on both axes, and a single tile
+        for size in [(64, 32), (70, 45), (10, 10)]:
+            for overlap in (0, 3):
+                with self.subTest(size=size, overlap=overlap):
+                    self.assert_cores_cover_once(size, TileConfig(tile_size=16, overlap=overlap))
+
+    def test_padding_is_overlap_on_interior_sides(self):
+        tiles = split_tiles((48, 16), TileConfig(tile_size=16, overlap=4))
+        self.assertEqual(tiles[1], ((16, 0, 32, 16), (12, 0, 36, 16)))
+
+
+class ProcessTiledTest(unittest.TestCase):
+
+    def test_output_matches_whole_image(self):
+        image = make_test_image(301, 203)
+        reference = anime_stylize(image, {})
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            result = process_tiled(image, anime_stylize, TileConfig(tile_size=64, overlap=4, min_pixels=0),
+                                   executor, max_inflight=4)
+        self.assertIsNone(ImageChops.difference(reference, result).getbbox())
+
+    def test_failed_tile_cancels_queued_tiles(self):
+        calls = []
+        release = threading.Event()
+
+        def failing_transform(tile, params):
+            calls.append(tile.size)
+            if len(calls) == 1:
+                raise ValueError("bad tile")
+            release.wait(1)
+            return tile
+
+        image = Image.new("RGB", (64, 64))
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            with self.assertRaises(ValueError):
+                process_tiled(image, failing_transform, TileConfig(tile_size=16, overlap=0),
+                              executor, max_inflight=8)
+            release.set()
+        # The failing tile, plus at most the one the worker picked up before the
+        # cancel; without cancellation all 8 queued tiles would have run
+        self.assertLessEqual(len(calls), 2)
+
+
+class TileConfigTest(unittest.TestCase):
+
+    def test_should_tile_thresholds(self):
+        config = TileConfig(tile_size=100, overlap=0, min_pixels=20_000)
+        self.assertFalse(config.should_tile((199, 100)))  # below min_pixels
+        self.assertTrue(config.should_tile((200, 100)))   # exactly min_pixels
+        self.assertTrue(config.should_tile((101, 1000)))
+        # Large enough, but fits in a single tile
+        self.assertFalse(TileConfig(tile_size=300, min_pixels=0).should_tile((300, 300)))
+        self.assertTrue(TileConfig(tile_size=300, min_pixels=0).should_tile((301, 300)))
+
+    def test_rejects_invalid_settings(self):
+        with self.assertRaises(ValueError):
+            TileConfig(tile_size=0)
+        with self.assertRaises(ValueError):
+            TileConfig(overlap=-1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import logging
+from collections import deque
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+Box = Tuple[int, int, int, int]
+# Transform applied per tile: (tile, params) -> tile of the same size.
+# Must be a picklable top-level function so it can run in worker processes.
+TileTransform = Callable[[Image.Image, Dict[str, Any]], Image.Image]
+
+# --- Configuration ---
+
+@dataclass(frozen=True)
+class TileConfig:
+    """
+    Tiling settings for one transform.
+    `overlap` is the extra context (px) read on each side of a tile and then
+    cropped away, so it must be at least the transform's receptive radius
+    for the stitched output to be seamless. Images smaller than `min_pixels`
+    are processed whole.
+    """
+    tile_size: int = 1024
+    overlap: int = 16
+    min_pixels: int = 4_000_000
+
+    def __post_init__(self):
+        if self.tile_size < 1 or self.overlap < 0 or self.min_pixels < 0:
+            raise ValueError("tile_size must be >= 1, overlap and min_pixels must be >= 0")
+
+    def should_tile(self, size: Tuple[int, int]) -> bool:
+        width, height = size
+        return width * height >= self.min_pixels and max(width, height) > self.tile_size
+
+# --- Tile Geometry ---
+
+def split_tiles(size: Tuple[int, int], config: TileConfig) -> List[Tuple[Box, Box]]:
+    """
+    Splits an image of `size` into a grid of tiles.
+    Returns (core_box, padded_box) pairs: core boxes cover the image exactly
+    once; padded boxes extend each core by `overlap`, clamped to the image.
+    """
+    width, height = size
+    tiles = []
+    for top in range(0, height, config.tile_size):
+        bottom = min(top + config.tile_size, height)
+        for left in range(0, width, config.tile_size):
+            right = min(left + config.tile_size, width)
+            padded = (
+                max(left - config.overlap, 0),
+                max(top - config.overlap, 0),
+                min(right + config.overlap, width),
+                min(bottom + config.overlap, height),
+            )
+            tiles.append(((left, top, right, bottom), padded))
+    return tiles
+
+# --- Execution ---
+
+def _run_tile(transform: TileTransform, mode: str, size: Tuple[int, int], data: bytes,
+              params: Dict[str, Any]) -> Tuple[str, Tuple[int, int], bytes]:
+    """Worker entry point. Tiles travel as raw bytes to keep pickling cheap."""
+    tile = Image.frombytes(mode, size, data)
+    result = transform(tile, params)
+    if result.size != size:
+        raise ValueError(f"Tile transform changed tile size from {size} to {result.size}")
+    return result.mode, result.size, result.tobytes()
+
+
+def process_tiled(image: Image.Image, transform: TileTransform, config: TileConfig,
+                  executor: Executor, params: Optional[Dict[str, Any]] = None,
+                  max_inflight: int = 8) -> Image.Image:
+    """
+    Runs `transform` over overlapping tiles of `image` on `executor` and
+    stitches the results. Each tile's overlap margin is discarded, so only
+    the core region (computed with full neighbourhood context) is kept.
+    At most `max_inflight` tiles are queued at once to bound memory. If a
+    tile fails, tiles not yet started are cancelled before the error is raised.
+    """
+    params = params or {}
+    tiles = split_tiles(image.size, config)
+    pending = deque()
+    output = None
+    next_tile = 0
+    try:
+        while next_tile < len(tiles) or pending:
+            while next_tile < len(tiles) and len(pending) < max_inflight:
+                core, padded = tiles[next_tile]
+                crop = image.crop(padded)
+                future = executor.submit(_run_tile, transform, crop.mode, crop.size, crop.tobytes(), params)
+                pending.append((core, padded, future))
+                next_tile += 1
+
+            core, padded, future = pending.popleft()
+            mode, size, data = future.result()
+            tile = Image.frombytes(mode, size, data)
+            if output is None:
+                output = Image.new(mode, image.size)
+            # Core position relative to the padded tile
+            left, top = core[0] - padded[0], core[1] - padded[1]
+            output.paste(tile.crop((left, top, left + core[2] - core[0], top + core[3] - core[1])), core[:2])
+    except BaseException:
+        # Don't leave the rest of a failed image queued on the workers
+        for _, _, future in pending:
+            future.cancel()
+        raise
+    logger.debug("Processed %dx%d image in %d tiles", image.size[0], image.size[1], len(tiles))
+    return output
@@ -24,13 +24,13 @@ def load_user_data():
                 # Convert keys back to int
                 user_database = {int(k): v for k, v in data.get("user_database", {}).items()}
                 access_requests = set(data.get("access_requests", []))
-                logger.info(f"Loaded user data from {USER_DATA_FILE}")
+                logger.info("Loaded user data from %s", USER_DATA_FILE)
         except (json.JSONDecodeError, IOError, TypeError) as e:
-            logger.error(f"Error loading user data from {USER_DATA_FILE}: {e}. Starting fresh.")
+            logger.error("Error loading user data from %s: %s. Starting fresh.", USER_DATA_FILE, e)
             user_database = {}
             access_requests = set()
     else:
-        logger.info(f"{USER_DATA_FILE} not found. Starting with empty user data.")
+        logger.info("%s not found. Starting with empty user data.", USER_DATA_FILE)
         user_database = {}
         access_requests = set()
 
@@ -44,9 +44,9 @@ def save_user_data():
         }
         with open(USER_DATA_FILE, 'w') as f:
             json.dump(data_to_save, f, indent=4)
-        # logger.debug(f"Saved user data to {USER_DATA_FILE}") # Use debug level to avoid spamming logs
+        # logger.debug("Saved user data to %s", USER_DATA_FILE) # Use debug level to avoid spamming logs
     except IOError as e:
-        logger.error(f"Error saving user data to {USER_DATA_FILE}: {e}")
+        logger.error("Error saving user data to %s: %s", USER_DATA_FILE, e)
 
 # Load data when the module is imported
 # load_user_data() # Uncomment this line to enable file persistence
@@ -77,14 +77,14 @@ def record_trial_use(user_id: int):
         user_database[user_id] = {}
     user_database[user_id]["used_trial"] = True
     user_database[user_id].setdefault("approved", False) # Ensure approved key exists
-    logger.info(f"User {user_id} used their trial.")
+    logger.info("User %s used their trial.", user_id)
     # save_user_data() # Uncomment for persistence
 
 def request_access(user_id: int):
     """Records an access request from a user."""
     if not has_access(user_id): # No need to request if already approved
         access_requests.add(user_id)
-        logger.info(f"User {user_id} requested access.")
+        logger.info("User %s requested access.", user_id)
         # save_user_data() # Uncomment for persistence
         return True
     return False # Already approved
@@ -96,19 +96,19 @@ def approve_user(user_id: int):
     user_database[user_id]["approved"] = True
     user_database[user_id].setdefault("used_trial", False) # Ensure trial key exists
     access_requests.discard(user_id) # Remove from requests if present
-    logger.info(f"Admin approved user {user_id}.")
+    logger.info("Admin approved user %s.", user_id)
     # save_user_data() # Uncomment for persistence
 
 def block_user(user_id: int):
     """Blocks (revokes approval) for a user."""
     if user_id in user_database:
         user_database[user_id]["approved"] = False
-        logger.info(f"Admin blocked user {user_id}.")
+        logger.info("Admin blocked user %s.", user_id)
         # save_user_data() # Uncomment for persistence
     else:
         # Optionally create an entry to explicitly mark as blocked
         user_database[user_id] = {"approved": False, "used_trial": True} # Assume blocked means trial used too
-        logger.info(f"Admin blocked new user {user_id}.")
+        logger.info("Admin blocked new user %s.", user_id)
         # save_user_data() # Uncomment for persistence
 
 def get_pending_requests() -> Set[int]: